@@ -14,7 +14,8 @@ const lambdas = new LambdaStack(app, 'LambdasStack', {
   sessionTable: storage.sessionsTable,
   videoUploadsBucket: storage.videoUploadsBucket,
   videoProcessingBucket: storage.videoProcessingBucket,
-  finalVideoBucket: storage.finalVideoBucket
+  finalVideoBucket: storage.finalVideoBucket,
+  analysisCacheBucket: storage.analysisCacheBucket
 })
 
 const stepFunctions = new StepFunctionsStack(app, 'StepFunctionStack', {
@@ -13,6 +13,7 @@ interface LambdaStackProps extends cdk.StackProps {
     videoUploadsBucket: s3.Bucket
     videoProcessingBucket: s3.Bucket
     finalVideoBucket: s3.Bucket
+    analysisCacheBucket: s3.Bucket
 }
 
 export class LambdaStack extends cdk.Stack {
@@ -37,6 +38,7 @@ export class LambdaStack extends cdk.Stack {
             timeout: cdk.Duration.seconds(60),
             environment: {
                 CACHE_TABLE_NAME: props.cacheTable.tableName,
+                CACHE_BUCKET_NAME: props.analysisCacheBucket.bucketName,
                 GEMINI_PARAM_NAME: '/ai-demo/gemini-api-key',
                 GITHUB_PARAM_NAME: '/ai-demo/github-token',
                 LOG_LEVEL: "INFO"
@@ -45,6 +47,7 @@ export class LambdaStack extends cdk.Stack {
 
         // Granting read and write permission to Cache Table
         props.cacheTable.grantReadWriteData(this.analysisLambda)
+        props.analysisCacheBucket.grantReadWrite(this.analysisLambda)
         
         // Grant permission to read SSM Parameters
         this.analysisLambda.addToRolePolicy(new iam.PolicyStatement({
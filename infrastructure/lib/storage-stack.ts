@@ -10,6 +10,7 @@ export class StorageStack extends cdk.Stack {
     public readonly videoUploadsBucket: s3.Bucket
     public readonly videoProcessingBucket: s3.Bucket
     public readonly finalVideoBucket: s3.Bucket
+    public readonly analysisCacheBucket: s3.Bucket
 
     constructor(scope: Construct, id: string, props?: cdk.StackProps) {
         super(scope, id, props)
@@ -92,6 +93,17 @@ export class StorageStack extends cdk.Stack {
             removalPolicy: cdk.RemovalPolicy.DESTROY,
             autoDeleteObjects: true
         })
+
+        // Large cached analysis payloads (the cache table only keeps their S3 key)
+        this.analysisCacheBucket = new s3.Bucket(this, 'AiDemoAnalysisCache', {
+            lifecycleRules: [
+                {
+                    expiration: cdk.Duration.days(30) // same as the longest cache table TTL (CACHE_TTL_MAX_DAYS)
+                }
+            ],
+            removalPolicy: cdk.RemovalPolicy.DESTROY,
+            autoDeleteObjects: true
+        })
     }
 }
 
@@ -0,0 +1,60 @@
+# credentials.py
+import os
+import logging
+import boto3
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
+
+# Created on first use and reused across warm Lambda invocations
+_ssm_client = None
+_dotenv_loaded = False
+
+
+def fetch_ssm_param(name: str) -> str:
+    """
+    Fetches a (decrypted) parameter from AWS SSM using a shared client
+
+    Args:
+        name: str: name of the SSM parameter
+
+    Returns:
+        str: parameter value, None if it could not be fetched
+    """
+    global _ssm_client
+    if _ssm_client is None:
+        _ssm_client = boto3.client("ssm")
+
+    try:
+        response = _ssm_client.get_parameter(
+            Name=name,
+            WithDecryption=True
+        )
+        return response['Parameter']['Value']
+
+    except ClientError as e:
+        logger.error(f"Error fetching parameter {name}: {e}")
+        return None
+
+
+def load_dotenv_once() -> bool:
+    """
+    Loads the local .env file into the environment, only on the first call
+
+    Returns:
+        bool: False if python-dotenv is not installed, else True
+    """
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return True
+
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        logger.warning("python-dotenv not found. Ensure it's installed for Local Environment")
+        return False
+
+    load_dotenv()
+    _dotenv_loaded = True
+    return True
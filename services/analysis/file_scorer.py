@@ -1,6 +1,8 @@
 # file_scorer.py
 
 import re
+import heapq
+from operator import itemgetter
 
 # Priority scores for specific files
 FILE_SCORES = {
@@ -64,6 +66,9 @@ PATH_PATTERNS = [
     (r'/app/', 10),
 ]
 
+# Files larger than this (in bytes) are never selected
+MAX_FILE_SIZE = 500000
+
 # Patterns to skip (low value files)
 SKIP_PATTERNS = [
     r'node_modules/',
@@ -99,6 +104,18 @@ SKIP_PATTERNS = [
     r'_test\.go$',
 ]
 
+# SKIP_PATTERNS are plain literals, optionally anchored with '$'. Split them into
+# suffixes (checked with a single str.endswith call) and substrings (plain `in`
+# checks), so no regex engine is involved in the skip check.
+_SKIP_SUFFIXES = tuple(p[:-1].replace('\\', '') for p in SKIP_PATTERNS if p.endswith('$'))
+_SKIP_SUBSTRINGS = tuple(p.replace('\\', '') for p in SKIP_PATTERNS if not p.endswith('$'))
+
+# PATH_PATTERNS are all '/<dir>/' literals, so one scan can find every such
+# directory in a path (the lookahead lets '/src/api/' report both). The entry
+# listed first in PATH_PATTERNS then wins, same as trying them in order
+_PATH_RE = re.compile("/(?=(" + "|".join(re.escape(p.strip('/')) for p, _ in PATH_PATTERNS) + ")/)")
+_PATH_BONUS = {pattern.strip('/'): (rank, bonus) for rank, (pattern, bonus) in enumerate(PATH_PATTERNS)}
+
 
 def should_skip(path: str) -> bool:
     """
@@ -110,9 +127,18 @@ def should_skip(path: str) -> bool:
     Returns:
         True if file should be skipped
     """
-    path_lower = path.lower()
-    for pattern in SKIP_PATTERNS:
-        if re.search(pattern, path_lower):
+    return _should_skip_lower(path.lower())
+
+
+def _should_skip_lower(path_lower: str) -> bool:
+    """
+    should_skip for a path that has already been lowercased
+    """
+    if path_lower.endswith(_SKIP_SUFFIXES):
+        return True
+    # Plain loop rather than any(<generator>): no generator object per path
+    for substring in _SKIP_SUBSTRINGS:
+        if substring in path_lower:
             return True
     return False
 
@@ -128,36 +154,68 @@ def score_file(path: str, size: int = 0) -> int:
     Returns:
         int: score (higher = more important)
     """
-    # Skip unwanted files
-    if should_skip(path):
-        return -1
-    
+    # Cheapest checks first, so most rejected files exit before any lowering
     # Skip very large files (> 500KB)
-    if size > 500000:
+    if size > MAX_FILE_SIZE:
         return -1
-    
-    score = 0
+
+    # Already-lowercase asset suffixes (the common case) need no lowering
+    if path.endswith(_SKIP_SUFFIXES):
+        return -1
+
+    # Lowercase once; the skip check, filename and path patterns all share it
     path_lower = path.lower()
-    filename = path_lower.split('/')[-1]
+
+    # Skip unwanted files
+    if _should_skip_lower(path_lower):
+        return -1
     
+    # Filename is everything after the last '/' (no split list needed)
+    idx = path_lower.rfind('/')
+
     # Check exact filename match
-    if filename in FILE_SCORES:
-        score += FILE_SCORES[filename]
+    score = FILE_SCORES.get(path_lower[idx + 1:], 0)
     
     # Check path patterns
-    for pattern, bonus in PATH_PATTERNS:
-        if re.search(pattern, path_lower):
-            score += bonus
-            break  # Only apply one path bonus
-    
-    # Small bonus for shorter paths (likely more important)
-    depth = path.count('/')
-    if depth <= 1:
+    matched_dirs = _PATH_RE.findall(path_lower)
+    if matched_dirs:
+        # Only apply one path bonus
+        score += min(_PATH_BONUS[name] for name in matched_dirs)[1]
+    
+    # Small bonus for shorter paths (likely more important): depth <= 1 means
+    # there is no other '/' before the last one, so no need to count them all
+    if idx < 0 or path_lower.rfind('/', 0, idx) < 0:
         score += 5
     
     return score
 
 
+def rank_files(files, max_files: int = 10) -> list:
+    """
+    Score (path, size) pairs and return the top N most important paths
+
+    Args:
+        files: iterable of (path, size) tuples; consumed once, can be a generator
+        max_files: maximum number of files to return
+
+    Returns:
+        list of file paths (strings)
+    """
+    # Bind to a local so the generator doesn't do a global lookup per file
+    _score = score_file
+
+    # Score lazily as (score, path) and drop files with -1 score, without
+    # materializing the scored list
+    scored_files = ((_score(path, size), path) for path, size in files)
+    kept_files = (item for item in scored_files if item[0] >= 0)
+
+    # Keep only the top N by score (highest first). nlargest is stable like the
+    # full sort was, so files with equal scores keep their tree order
+    top_scored = heapq.nlargest(max_files, kept_files, key=itemgetter(0))
+
+    return [path for _, path in top_scored]
+
+
 def get_high_value_files(files: list, max_files: int = 10) -> list:
     """
     Score all files and return top N most important
@@ -169,23 +227,4 @@ def get_high_value_files(files: list, max_files: int = 10) -> list:
     Returns:
         list of file paths (strings)
     """
-    # Score each file
-    scored_files = []
-    for file in files:
-        path = file.get("path", "")
-        size = file.get("size", 0)
-        score = score_file(path, size)
-        
-        if score >= 0:  # Skip files with -1 score
-            scored_files.append({
-                "path": path,
-                "score": score
-            })
-    
-    # Sort by score (highest first)
-    scored_files.sort(key=lambda x: x["score"], reverse=True)
-    
-    # Return top N file paths
-    top_files = [f["path"] for f in scored_files[:max_files]]
-    
-    return top_files
\ No newline at end of file
+    return rank_files(((file.get("path", ""), file.get("size", 0)) for file in files), max_files)
@@ -1,13 +1,58 @@
 # gemini_client.py
 import os
 import json
-import boto3
+import hashlib
 import logging
-from botocore.exceptions import ClientError
+import gh_cache
 from google import genai
+from google.genai import types
+from credentials import fetch_ssm_param, load_dotenv_once
+
+# orjson is a faster drop-in for parsing model output; fall back if it isn't installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 _gemini_api_key = None
 
+SUGGESTIONS_MODEL = 'gemini-2.0-flash'
+
+# Gemini's constrained decoding returns bare JSON matching these schemas, so the
+# responses can be parsed directly (no markdown code fences to strip)
+_STRING_LIST_SCHEMA = types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING))
+
+_SUGGESTIONS_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=types.Schema(
+        type=types.Type.ARRAY,
+        items=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "title": types.Schema(type=types.Type.STRING),
+                "duration_seconds": types.Schema(type=types.Type.INTEGER),
+                "description": types.Schema(type=types.Type.STRING),
+                "talking_points": _STRING_LIST_SCHEMA,
+                "features_to_highlight": _STRING_LIST_SCHEMA,
+                "suggested_visuals": _STRING_LIST_SCHEMA
+            },
+            required=["title", "duration_seconds", "description", "talking_points", "features_to_highlight", "suggested_visuals"]
+        )
+    )
+)
+
+# Part of the suggestions cache key: changing the schema (or any other config field)
+# must not serve answers generated against the old one
+_SUGGESTIONS_CONFIG_DIGEST = hashlib.sha256(
+    _SUGGESTIONS_CONFIG.model_dump_json(exclude_none=True).encode('utf-8')
+).hexdigest()[:16]
+
+_FILE_SELECTION_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=_STRING_LIST_SCHEMA
+)
+
 logger = logging.getLogger()
 logger.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
 
@@ -17,19 +62,6 @@ def is_running_on_aws() -> bool:
     """
     return "AWS_LAMBDA_RUNTIME_API" in os.environ
 
-def _clean_json_response(response_text: str) -> str:
-    """
-    Remove markdown code blocks from Gemini response
-    """
-    response_text = response_text.strip()
-    if response_text.startswith("```json"):
-        response_text = response_text[7:]
-    if response_text.startswith("```"):
-        response_text = response_text[3:]
-    if response_text.endswith("```"):
-        response_text = response_text[:-3]
-    return response_text.strip()
-
 def get_api_key() -> str:
     """
     Get Gemini API key from AWS or environment (local)
@@ -53,40 +85,39 @@ def get_api_key() -> str:
             return None
 
         # Get token from AWS
-        ssm_client = boto3.client("ssm")
-
-        try:
-            response = ssm_client.get_parameter(
-                Name=api_key_param_name,
-                WithDecryption=True
-            )
-
-            _gemini_api_key = response['Parameter']['Value']
-        
-        except ClientError as e:
-            logger.error(f"Error fetching Gemini API Key: {e}")
-            return None
+        _gemini_api_key = fetch_ssm_param(api_key_param_name)
     else:
         # if not running on AWS
         logger.info("Running Locally. Fetching api keys from environment")
-        try:
-            from dotenv import load_dotenv
-            load_dotenv()
-            _gemini_api_key = os.environ.get("GEMINI_API_KEY")
-        except ImportError:
-            logger.error(f"Unable to import loadenv")
+        if not load_dotenv_once():
             return None
+
+        _gemini_api_key = os.environ.get("GEMINI_API_KEY")
     return _gemini_api_key
 
 
-def build_prompt(metadata: dict, file_tree: dict, file_contents: dict) -> str:
+def _format_file_section(path: str, content: str) -> str:
+    """
+    Formats one file for the "Key Files Content" section of the prompt
+    """
+    # Truncate very long files
+    if len(content) > 5000:
+        content = content[:5000] + "\n... (truncated)"
+
+    # Detect language from extension
+    ext = path.split('.')[-1] if '.' in path else ''
+    return f"\n### {path}\n```{ext}\n{content}\n```\n"
+
+
+def build_prompt(metadata: dict, file_tree: dict, paths: list, contents: list) -> str:
     """
     Build the prompt for Gemini
 
     Args:
         metadata: repo metadata (name, description, language, etc.)
         file_tree: list of all file paths
-        file_contents: dict of {path: content} for high-value files
+        paths: list of high-value file paths
+        contents: list of their contents, parallel to paths
     
     Returns:
         str: formatted prompt
@@ -96,16 +127,8 @@ def build_prompt(metadata: dict, file_tree: dict, file_contents: dict) -> str:
     if len(file_tree) > 100:
         tree_str += f"\n... and {len(file_tree) - 100} more files"
 
-    # Format file contents
-    contents_str = ""
-    for path, content in file_contents.items():
-        # Truncate very long files
-        if len(content) > 5000:
-            content = content[:5000] + "\n... (truncated)"
-
-        # Detect language from extension
-        ext = path.split('.')[-1] if '.' in path else ''
-        contents_str += f"\n### {path}\n```{ext}\n{content}\n```\n"
+    # Format file contents in a single join over the parallel lists
+    contents_str = "".join(map(_format_file_section, paths, contents))
 
     prompt = f"""You are analyzing a GitHub repository to suggest demo video clips for showcasing this project.
 
@@ -164,18 +187,43 @@ Return ONLY valid JSON, nothing else"""
     return prompt
 
 
-def generate_suggestions(metadata: dict, file_tree: list, file_contents: dict) -> dict:
+def generate_suggestions(metadata: dict, file_tree: list, paths: list, contents: list) -> dict:
     """
     Generate video suggestions using Gemini API
 
     Args:
         metadata: dict: repo metadata
         file_tree: list: list of all file paths
-        file_contents: dict: dict of {path: content}
+        paths: list: paths of the files whose contents are included
+        contents: list: contents of those files, parallel to paths
 
     Returns: 
         dict with statusCode and body containing suggestions or error
     """
+    # Build Prompt
+    prompt = build_prompt(metadata=metadata, file_tree=file_tree, paths=paths, contents=contents)
+
+    # A new commit that leaves the prompted files and tree listing unchanged reuses the
+    # earlier answer (same-commit repeats never get here, the result cache answers them).
+    # The star count is blanked out of the hashed prompt since it moves on its own, and
+    # the model and response config are part of the key so changing either starts afresh
+    stable_prompt = build_prompt(metadata={**metadata, "stars": None}, file_tree=file_tree, paths=paths, contents=contents)
+    prompt_digest = hashlib.sha256(stable_prompt.encode('utf-8')).hexdigest()
+    cache_key = f"gemini:{SUGGESTIONS_MODEL}:{_SUGGESTIONS_CONFIG_DIGEST}:{prompt_digest}"
+    cached = gh_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Using cached Gemini suggestions")
+        suggestions = _json_loads(cached)
+        return {
+            "statusCode": 200,
+            "body": {
+                "data": {
+                    "suggestions": suggestions,
+                    "suggestion_count": len(suggestions)
+                }
+            }
+        }
+
     # Get API key
     api_key = get_api_key()
 
@@ -189,19 +237,18 @@ def generate_suggestions(metadata: dict, file_tree: list, file_contents: dict) -
     
     # Configure Gemini
     client = genai.Client(api_key=api_key)
-    
-    # Build Prompt
-    prompt = build_prompt(metadata=metadata, file_tree=file_tree, file_contents=file_contents)
 
     try:
         # Generate response
         response = client.models.generate_content(
-        model = 'gemini-2.0-flash',
-        contents=prompt
+        model = SUGGESTIONS_MODEL,
+        contents=prompt,
+        config=_SUGGESTIONS_CONFIG
         )
-        response_text = _clean_json_response(response.text)
+        response_text = response.text
 
-        suggestions = json.loads(response_text)
+        suggestions = _json_loads(response_text)
+        gh_cache.put(cache_key, response_text.encode('utf-8'))
 
         return {
             "statusCode": 200, 
@@ -277,10 +324,10 @@ Return only a JSON array of {max_files} file paths, nothing else:
     try:
         response = client.models.generate_content(
         model = 'gemini-1.5-flash',
-        contents=prompt
+        contents=prompt,
+        config=_FILE_SELECTION_CONFIG
         )
-        response_text = _clean_json_response(response.text)
-        files = json.loads(response_text)
+        files = _json_loads(response.text)
 
         valid_files = [file for file in files if file in file_tree]
 
@@ -0,0 +1,144 @@
+# gh_cache.py
+import os
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger()
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
+
+# Local response cache for the analysis service's upstream calls. Despite the name it
+# is not GitHub-only; each caller keeps to its own key prefix:
+#   meta:    repo metadata (github_client, read with a max_age)
+#   tree:    file trees pinned to a commit SHA (github_client)
+#   content: file contents pinned to a commit SHA (github_client)
+#   gemini:  Gemini suggestions keyed by model, response config and prompt (gemini_client)
+
+# On Lambda only /tmp is writable, and it survives across warm invocations.
+# Set GITHUB_CACHE_PATH to an empty string to disable the cache.
+_DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), "ai-demo-github-cache.sqlite3")
+
+# /tmp is shared with everything else in the container (512 MB by default), so the
+# cache is pruned on write: entries older than MAX_AGE_SECONDS go first, then the
+# oldest entries until the bodies fit in MAX_BYTES. Pruning runs every PRUNE_EVERY
+# writes rather than on each one
+MAX_AGE_SECONDS = 24 * 60 * 60
+MAX_BYTES = 128 * 1024 * 1024
+PRUNE_EVERY = 50
+
+_connection = None
+_writes_since_prune = 0
+_lock = threading.Lock()
+
+
+def _get_connection():
+    """
+    Opens the cache database on first use
+
+    Returns:
+        sqlite3.Connection or None if the cache is disabled / unavailable
+    """
+    global _connection
+    if _connection is not None:
+        return _connection
+
+    cache_path = os.environ.get("GITHUB_CACHE_PATH", _DEFAULT_CACHE_PATH)
+    if not cache_path:
+        return None
+
+    try:
+        # One connection shared by the fetch threads, serialized through _lock
+        connection = sqlite3.connect(cache_path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS blob(key TEXT PRIMARY KEY, body BLOB, ts INTEGER)")
+        connection.execute("CREATE INDEX IF NOT EXISTS blob_ts ON blob(ts)")
+        connection.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"GitHub cache unavailable at {cache_path}: {e}")
+        return None
+
+    _connection = connection
+    return _connection
+
+
+def get(key: str, max_age: int = None) -> bytes:
+    """
+    Looks up a cached response body
+
+    Args:
+        key: str: cache key
+        max_age: int: maximum age of the entry in seconds, None for entries that never expire
+
+    Returns:
+        bytes: cached body or None on miss
+    """
+    with _lock:
+        connection = _get_connection()
+        if connection is None:
+            return None
+
+        try:
+            row = connection.execute("SELECT body, ts FROM blob WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"GitHub cache read failed for {key}: {e}")
+            return None
+
+    if row is None:
+        return None
+
+    body, ts = row
+    if max_age is not None and time.time() - ts > max_age:
+        return None
+
+    return body
+
+
+def _prune(connection) -> None:
+    """
+    Deletes expired entries, then the oldest ones while the cache is over MAX_BYTES.
+    Must be called with _lock held
+    """
+    connection.execute("DELETE FROM blob WHERE ts < ?", (int(time.time()) - MAX_AGE_SECONDS,))
+
+    # length() reads the stored size without loading the bodies
+    total_bytes = connection.execute("SELECT COALESCE(SUM(length(body)), 0) FROM blob").fetchone()[0]
+    if total_bytes > MAX_BYTES:
+        evicted = []
+        for key, size in connection.execute("SELECT key, length(body) FROM blob ORDER BY ts"):
+            if total_bytes <= MAX_BYTES:
+                break
+            evicted.append((key,))
+            total_bytes -= size or 0
+        connection.executemany("DELETE FROM blob WHERE key = ?", evicted)
+
+
+def put(key: str, body: bytes) -> None:
+    """
+    Stores a response body in the cache
+
+    Args:
+        key: str: cache key
+        body: bytes: response body to store
+    """
+    global _writes_since_prune
+    with _lock:
+        connection = _get_connection()
+        if connection is None:
+            return
+
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO blob(key, body, ts) VALUES (?, ?, ?)",
+                (key, body, int(time.time()))
+            )
+
+            _writes_since_prune += 1
+            if _writes_since_prune >= PRUNE_EVERY:
+                _writes_since_prune = 0
+                _prune(connection)
+
+            connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"GitHub cache write failed for {key}: {e}")
@@ -1,8 +1,24 @@
 import requests
 import os
+import re
+import json
+import random
 import logging
-import boto3
-from botocore.exceptions import ClientError
+import threading
+import gh_cache
+from collections import deque
+from typing import Iterator
+from credentials import fetch_ssm_param, load_dotenv_once
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson parses large tree responses several times faster than the stdlib; fall back if it isn't installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 logger = logging.getLogger()
 logger.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
@@ -16,7 +32,71 @@ ERROR_CODE = {
     500: "INTERNAL_SERVER_ERROR"
 }
 
-_github_token = None
+# Pool of GitHub tokens, rotated per request so bursts are spread over several rate limits
+_github_tokens = None
+_github_tokens_lock = threading.Lock()
+
+# Metadata can change (stars, description) so it's only reused for a short while.
+# Trees and file contents are pinned to a commit SHA and never go stale.
+METADATA_CACHE_TTL_SECONDS = 300
+
+_COMMIT_SHA_RE = re.compile(r'[0-9a-f]{40}')
+
+GRAPHQL_API = "https://api.github.com/graphql"
+
+# Metadata plus the default branch head commit, in the shape get_repo_metadata returns
+REPO_HEADER_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    name
+    description
+    stargazerCount
+    url
+    primaryLanguage { name }
+    repositoryTopics(first: 20) { nodes { topic { name } } }
+    defaultBranchRef {
+      name
+      target { ... on Commit { oid committedDate } }
+    }
+  }
+}
+"""
+
+# GraphQL error types mapped to the REST status codes used in ERROR_CODE
+GRAPHQL_ERROR_STATUS = {
+    "NOT_FOUND": 404,
+    "FORBIDDEN": 403,
+    "RATE_LIMITED": 403
+}
+
+# Connections kept open to api.github.com; get_file_contents_bulk never runs more
+# fetches than this so no request waits on (or throws away) a pooled connection
+HTTP_POOL_SIZE = 20
+
+# Shared session so repeated calls reuse the TCP/TLS connection to api.github.com.
+# Transient gateway errors are retried; the last response is returned as-is so the
+# status code still maps through ERROR_CODE. A failed connect is retried once, a read
+# timeout never (re-raised as-is so it still maps to REQUEST_TIMEOUT), which keeps a
+# hung GitHub from multiplying the per-call timeout past the Lambda's budget
+_session = requests.Session()
+_session.headers.update({
+    "Accept": "application/vnd.github+json",
+    "User-Agent": "AI-Demo-Builder",
+    "X-GitHub-Api-Version": "2022-11-28"
+})
+_session.mount("https://", HTTPAdapter(
+    pool_connections=HTTP_POOL_SIZE,
+    pool_maxsize=HTTP_POOL_SIZE,
+    max_retries=Retry(
+        total=3,
+        connect=1,
+        read=False,
+        status=3,
+        backoff_factor=0.2,
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False
+    )
+))
 
 def _is_running_on_aws() -> bool:
     """
@@ -29,17 +109,39 @@ def _is_running_on_aws() -> bool:
     return "AWS_LAMBDA_RUNTIME_API" in os.environ
 
 
-def _get_credentials() -> str:
+def _parse_tokens(value: str) -> list:
+    """
+    Parses a token setting: either a JSON list of tokens or a single token
+
+    Returns:
+        list: non-empty tokens
     """
-    Returns the GitHub Credential
+    if not value:
+        return []
+
+    value = value.strip()
+    if value.startswith("["):
+        try:
+            tokens = json.loads(value)
+        except json.JSONDecodeError as e:
+            logger.error(f"GitHub token list is not valid JSON: {e}")
+            return []
+        return [token for token in tokens if isinstance(token, str) and token]
+
+    return [value]
+
+
+def _get_credentials() -> deque:
+    """
+    Returns the GitHub Credentials
 
     Returns: 
-        str: github_token if present, else None
+        deque: shuffled github tokens if present, else None
     """
-    # Check if the github token is fetched already
-    global _github_token
-    if _github_token is not None:
-        return _github_token
+    # Check if the github tokens are fetched already
+    global _github_tokens
+    if _github_tokens is not None:
+        return _github_tokens
     # Determine if we are running the function locally or on AWS Lambda
     is_aws = _is_running_on_aws()
     
@@ -52,35 +154,44 @@ def _get_credentials() -> str:
             logger.error("GITHUB_PARAM_NAME environment variable not set")
             return None
         
-        # Get credentials from AWS SSM
-        ssm_client = boto3.client('ssm')
-        
-        try:
-            response = ssm_client.get_parameter(
-                Name=github_param_name,
-                WithDecryption=True
-            )
-
-            _github_token = response['Parameter']['Value']
-            logger.info("Successfully retrieved GitHub token from AWS")
-        
-        except ClientError as e:
-            logger.error(f"Error fetching parameter {github_param_name}: {e}")
+        # Get credentials from AWS SSM (a single token or a JSON list of tokens)
+        param_value = fetch_ssm_param(github_param_name)
+        if param_value is None:
             return None
 
+        tokens = _parse_tokens(param_value)
+        logger.info(f"Successfully retrieved {len(tokens)} GitHub token(s) from AWS")
+
     else:
         logger.info("Running locally - loading from .env")
-        try:
-            from dotenv import load_dotenv
-            load_dotenv()
-            _github_token = os.environ.get("GITHUB_TOKEN")
-            if not _github_token:
-                logger.warning("GITHUB_TOKEN not found in environment")
-        except ImportError:
-            logger.warning(f"python-dotenv not found. Ensure it's installed for Local Environment")
+        if not load_dotenv_once():
             return None
-    
-    return _github_token
+
+        tokens = _parse_tokens(os.environ.get("GITHUB_TOKENS")) or _parse_tokens(os.environ.get("GITHUB_TOKEN"))
+        if not tokens:
+            logger.warning("GITHUB_TOKENS / GITHUB_TOKEN not found in environment")
+
+    # Shuffle so concurrent Lambda instances don't all start on the same token
+    random.shuffle(tokens)
+    _github_tokens = deque(tokens)
+    return _github_tokens
+
+
+def _next_token() -> str:
+    """
+    Returns the next GitHub token in round-robin order (thread-safe)
+
+    Returns:
+        str: github token, None if there are no tokens
+    """
+    tokens = _get_credentials()
+    if not tokens:
+        return None
+
+    with _github_tokens_lock:
+        token = tokens[0]
+        tokens.rotate(-1)
+    return token
 
 def create_response(status_code: int, data: dict = None, error_code: str = None) -> dict:
     """
@@ -107,17 +218,33 @@ def create_response(status_code: int, data: dict = None, error_code: str = None)
     }
 
 
+def _is_commit_sha(ref: str) -> bool:
+    """
+    True if ref is a full commit SHA (immutable), rather than a branch name
+    """
+    return bool(ref) and _COMMIT_SHA_RE.fullmatch(ref) is not None
+
+
+def _json_body(response) -> dict:
+    """
+    Parses a JSON response body straight from the raw bytes
+
+    Raises:
+        requests.exceptions.InvalidJSONError: if the body is not valid JSON
+    """
+    try:
+        return _json_loads(response.content)
+    except ValueError as e:
+        raise requests.exceptions.InvalidJSONError(f"Invalid JSON from {response.url}: {e}", response=response)
+
+
 def _get_headers() -> dict:
     """
-    Returnes headers for GitHub API
+    Returnes per-request headers for GitHub API (the static ones are set on _session)
     """
-    headers = {
-        "Accept": "application/vnd.github+json",
-        "User-Agent": "AI-Demo-Builder",
-        "X-GitHub-Api-Version": "2022-11-28"
-    }
+    headers = {}
 
-    token = _get_credentials()
+    token = _next_token()
 
     if token:
         headers["Authorization"] = f"Bearer {token}"
@@ -136,6 +263,12 @@ def get_repo_metadata(owner: str, repo: str) -> dict:
     Returns: 
         dict: statusCode and body containing repo metadata or error
     """
+    cache_key = f"meta:{owner.lower()}/{repo.lower()}"
+    cached = gh_cache.get(cache_key, max_age=METADATA_CACHE_TTL_SECONDS)
+    if cached is not None:
+        logger.info(f"Using cached metadata for {owner}/{repo}")
+        return create_response(200, data=_json_loads(cached))
+
     # Configuring the request
     # GitHub API
     GITHUB_API = f"https://api.github.com/repos/{owner}/{repo}"
@@ -144,17 +277,17 @@ def get_repo_metadata(owner: str, repo: str) -> dict:
     headers = _get_headers()
     
     try:
-        response = requests.get(GITHUB_API, headers=headers, timeout=10)
+        response = _session.get(GITHUB_API, headers=headers, timeout=10)
 
         # if there is an error response
         if response.status_code != 200:
             logger.warning(f"GitHub API returned {response.status_code} for {owner}/{repo}")
             return create_response(response.status_code)
         
-        response_data = response.json()
+        response_data = _json_body(response)
         logger.info(f"Successfully fetched metadata for {owner}/{repo}")
 
-        return create_response(200, data={
+        metadata = {
             "name": response_data.get("name"),
             "description": response_data.get("description"),
             "stars": response_data.get("stargazers_count"),
@@ -162,7 +295,10 @@ def get_repo_metadata(owner: str, repo: str) -> dict:
             "default_branch": response_data.get("default_branch"),
             "language": response_data.get("language"),
             "html_url": response_data.get("html_url")
-        })
+        }
+        gh_cache.put(cache_key, json.dumps(metadata).encode("utf-8"))
+
+        return create_response(200, data=metadata)
 
     except requests.exceptions.Timeout:
         logger.error(f"Timeout fetching metadata for {owner}/{repo}")
@@ -175,35 +311,44 @@ def get_repo_metadata(owner: str, repo: str) -> dict:
         return create_response(500)
     
 
-def get_latest_commit_sha(owner: str, repo: str, default_branch: str) -> dict:
+def get_latest_commit_sha(owner: str, repo: str, default_branch: str = None) -> dict:
     """
     Calls the GitHub API to fetch the latest commit sha for the default branch
 
     Args:
         owner: str: name of the owner of the repository
         repo: str: name of the repository
-        default_branch: str: name of the latest branch of the repository
+        default_branch: str: name of the latest branch of the repository. If None, the
+                             repository's default branch is used without looking it up first
     
         Returns:
-            str: latest SHA Commit for the given repository
+            str: latest SHA Commit for the given repository, and its commit date
     """
-    LATEST_COMMIT_API = f"https://api.github.com/repos/{owner}/{repo}/commits/{default_branch}"
+    if default_branch:
+        LATEST_COMMIT_API = f"https://api.github.com/repos/{owner}/{repo}/commits/{default_branch}"
+    else:
+        # The commit list is on the default branch and newest first
+        LATEST_COMMIT_API = f"https://api.github.com/repos/{owner}/{repo}/commits?per_page=1"
     
     try:
         # Getting the headers for the api call
         headers = _get_headers()
 
         # Making the API call
-        response = requests.get(LATEST_COMMIT_API, headers=headers, timeout=10)
+        response = _session.get(LATEST_COMMIT_API, headers=headers, timeout=10)
 
         # If there is issue with the request
         if response.status_code != 200:
             return create_response(status_code=response.status_code)
 
-        response_data = response.json()
+        response_data = _json_body(response)
+        if not default_branch:
+            response_data = response_data[0] if response_data else {}
         
+        committer = (response_data.get("commit") or {}).get("committer") or {}
         return create_response(200, data = {
-            "latest_commit_sha": response_data.get("sha")
+            "latest_commit_sha": response_data.get("sha"),
+            "latest_commit_date": committer.get("date")
         })
     
     except requests.exceptions.Timeout:
@@ -215,6 +360,102 @@ def get_latest_commit_sha(owner: str, repo: str, default_branch: str) -> dict:
         return create_response(500)
     
 
+def get_repo_header(owner: str, repo: str) -> dict:
+    """
+    Fetches the repo metadata and the latest commit SHA of the default branch in one
+    GitHub GraphQL request (one round-trip and rate-limit point instead of two REST calls).
+    GraphQL needs a token; without one this falls back to the two REST calls
+
+    Args:
+        owner: str: name of the owner
+        repo: str: name of the repo
+
+    Returns:
+        dict: statusCode and body containing {"metadata": {...}, "latest_commit_sha": str or None,
+              "latest_commit_date": ISO 8601 str or None}
+    """
+    if not _get_credentials():
+        metadata_response = get_repo_metadata(owner=owner, repo=repo)
+        if metadata_response["statusCode"] != 200:
+            return metadata_response
+
+        commit_response = get_latest_commit_sha(owner=owner, repo=repo)
+        commit_data = {}
+        if commit_response["statusCode"] == 200:
+            commit_data = commit_response["body"]["data"]
+
+        return create_response(200, data={
+            "metadata": metadata_response["body"]["data"],
+            "latest_commit_sha": commit_data.get("latest_commit_sha"),
+            "latest_commit_date": commit_data.get("latest_commit_date")
+        })
+
+    try:
+        response = _session.post(
+            GRAPHQL_API,
+            headers=_get_headers(),
+            json={"query": REPO_HEADER_QUERY, "variables": {"owner": owner, "name": repo}},
+            timeout=10
+        )
+
+        if response.status_code != 200:
+            logger.warning(f"GraphQL API returned {response.status_code} for {owner}/{repo}")
+            return create_response(response.status_code)
+
+        response_data = _json_body(response)
+
+        # GraphQL reports failures inside a 200 response
+        errors = response_data.get("errors")
+        if errors:
+            logger.warning(f"GraphQL errors for {owner}/{repo}: {errors}")
+            return create_response(GRAPHQL_ERROR_STATUS.get(errors[0].get("type"), 500))
+
+        repository = (response_data.get("data") or {}).get("repository")
+        if repository is None:
+            return create_response(404)
+
+        # Empty repositories have no default branch (and so no commit)
+        branch_ref = repository.get("defaultBranchRef") or {}
+        language = repository.get("primaryLanguage") or {}
+        topics = (repository.get("repositoryTopics") or {}).get("nodes", [])
+        target = branch_ref.get("target") or {}
+
+        logger.info(f"Successfully fetched metadata and latest commit for {owner}/{repo}")
+
+        return create_response(200, data={
+            "metadata": {
+                "name": repository.get("name"),
+                "description": repository.get("description"),
+                "stars": repository.get("stargazerCount"),
+                "topics": [node["topic"]["name"] for node in topics],
+                "default_branch": branch_ref.get("name"),
+                "language": language.get("name"),
+                "html_url": repository.get("url")
+            },
+            "latest_commit_sha": target.get("oid"),
+            "latest_commit_date": target.get("committedDate")
+        })
+
+    except requests.exceptions.Timeout:
+        logger.error(f"Timeout fetching repo header for {owner}/{repo}")
+        return create_response(503, error_code="REQUEST_TIMEOUT")
+    except requests.exceptions.ConnectionError:
+        logger.error(f"Connection error for {owner}/{repo}")
+        return create_response(503, error_code="CONNECTION_ERROR")
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Repo header request failed for {owner}/{repo}: {e}")
+        return create_response(500)
+
+
+def _iter_blobs(tree_items) -> Iterator[tuple]:
+    """
+    Yields (path, size) for the file (blob) entries of a GitHub tree
+    """
+    for item in tree_items:
+        if item["type"] == "blob":
+            yield item["path"], item.get("size", 0)
+
+
 def get_file_tree(owner: str, repo: str, branch: str):
     """
     Calls the GitHub API to get the tree of a given branch
@@ -222,11 +463,25 @@ def get_file_tree(owner: str, repo: str, branch: str):
     Args:
         owner: str: name of the owner of teh GitHub Repository
         repo: str: name of the repository
-        branch: str: name of the branch we want to get the tree of
+        branch: str: name of the branch (or commit SHA) we want to get the tree of.
+                     Trees fetched by commit SHA are cached locally
 
     Returns:
-        dict: returns dictionary of the tree of the branch
+        dict: returns dictionary of the tree of the branch: "files" ({"path", "size"} dicts)
+              and "file_paths" (the same paths as plain strings), built in one pass when
+              fetched from GitHub
     """
+    cache_key = None
+    if _is_commit_sha(branch):
+        cache_key = f"tree:{owner.lower()}/{repo.lower()}@{branch}"
+        cached = gh_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached file tree for {owner}/{repo}@{branch}")
+            tree_data = _json_loads(cached)
+            # Only the rich list is cached (storing the paths twice would double the entry)
+            tree_data["file_paths"] = [f["path"] for f in tree_data["files"]]
+            return create_response(200, data=tree_data)
+
     logger.info(f"Fetching file tree for {owner}/{repo}@{branch}")
     GITHUB_TREE_API = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
     
@@ -235,30 +490,36 @@ def get_file_tree(owner: str, repo: str, branch: str):
 
     try:
         # Making the API call
-        response = requests.get(GITHUB_TREE_API, headers=headers, timeout=10)
+        response = _session.get(GITHUB_TREE_API, headers=headers, timeout=10)
 
         if response.status_code != 200:
             logger.warning(f"Tree API returned {response.status_code}")
             return create_response(status_code=response.status_code)
         
-        response_data = response.json()
+        response_data = _json_body(response)
         tree = response_data.get("tree", [])
 
-        files = [
-            {
-                "path": item["path"],
-                "size": item.get("size", 0)
-            }
-            for item in tree if item["type"] == "blob"
-        ]
+        files = []
+        file_paths = []
+        for path, size in _iter_blobs(tree):
+            files.append({
+                "path": path,
+                "size": size
+            })
+            file_paths.append(path)
 
         logger.info(f"Found {len(files)} files in {owner}/{repo}")
 
-        return create_response(200, data= {
+        tree_data = {
             "files": files,
             "truncated" : response_data.get("truncated", False),
             "file_count": len(files)
-        })
+        }
+        if cache_key:
+            gh_cache.put(cache_key, json.dumps(tree_data).encode("utf-8"))
+
+        tree_data["file_paths"] = file_paths
+        return create_response(200, data=tree_data)
     
     except requests.exceptions.Timeout:
         logger.error(f"Timeout fetching tree for {owner}/{repo}")
@@ -271,7 +532,7 @@ def get_file_tree(owner: str, repo: str, branch: str):
         return create_response(500)
 
 
-def get_file_content(owner: str, repo: str, path: str, max_size: int = 100000) -> dict:
+def get_file_content(owner: str, repo: str, path: str, max_size: int = 100000, ref: str = None) -> dict:
     """
     Fetches raw contents of a specific file from GitHub
 
@@ -279,45 +540,83 @@ def get_file_content(owner: str, repo: str, path: str, max_size: int = 100000) -
         owner: str: name of the owner of the repo
         repo: str: name of the repository
         path: str: file path (e.g., "src/index.js")
+        max_size: int: maximum file size in bytes; larger files are skipped after
+                       reading at most max_size plus one 16 KiB chunk
+        ref: str: commit SHA to read the file at (default branch if None).
+                  Contents fetched by commit SHA are cached locally
 
     Returns:
-        dict: status code and body containing file content or error
+        dict: status code and body containing file content or error. On success the data is
+              {"path": str, "content": str or None, "size": int or None, "skipped": bool}
+              plus "reason": "FILE_TOO_LARGE" for skipped files. "size" is the byte size of
+              the content for fetched files; for skipped files it is the full size from
+              Content-Length, or None when the response doesn't give it (chunked or
+              compressed bodies), since only part of the file was read
     """
-    logger.debug(f"Fetching content for {path}")
+    cache_key = None
+    if _is_commit_sha(ref):
+        # max_size is part of the key: a file skipped as too large under one limit may fit another
+        cache_key = f"content:{owner.lower()}/{repo.lower()}@{ref}:{max_size}:{path}"
+        cached = gh_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Using cached content for %s", path)
+            return create_response(200, data=_json_loads(cached))
+
+    logger.debug("Fetching content for %s", path)
 
     CONTENT_API = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
     
     headers = _get_headers()
     # Request raw content directly
     headers["Accept"] = "application/vnd.github.raw"
+    params = {"ref": ref} if ref else None
 
     try:
-        response = requests.get(CONTENT_API, headers=headers, timeout=10)
-
-        if response.status_code != 200:
-            logger.warning(f"Content API returned {response.status_code} for {path}")
-            return create_response(status_code=response.status_code)
-        
-        content = response.text
-        logger.debug(f"Fetched {len(content)} bytes for {path}")
-
-
-        if len(content) > max_size:
-            logger.info(f"Skipping the file: {path} because File is too large")
-            return create_response(200, data={
+        # Stream the body and stop reading once it exceeds max_size, so oversized
+        # files are never held in memory in full
+        with _session.get(CONTENT_API, headers=headers, params=params, timeout=10, stream=True) as response:
+            if response.status_code != 200:
+                logger.warning(f"Content API returned {response.status_code} for {path}")
+                return create_response(status_code=response.status_code)
+
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=16384):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > max_size:
+                    break
+
+        if size > max_size:
+            # Only the first chunks were read, so `size` says nothing about the file.
+            # Report Content-Length when it is the plain body size (not a compressed one)
+            content_length = response.headers.get("Content-Length")
+            if response.headers.get("Content-Encoding") or not (content_length or "").isdigit():
+                content_length = None
+            file_size = int(content_length) if content_length else None
+
+            logger.info("Skipping the file: %s because File is too large (%s bytes, max %d)",
+                        path, file_size if file_size is not None else "unknown", max_size)
+            content_data = {
                 "path": path, 
                 "content": None,
-                "size": len(content),
+                "size": file_size,
                 "skipped": True,
                 "reason": "FILE_TOO_LARGE"
-            })
+            }
+        else:
+            logger.debug("Fetched %d bytes for %s", size, path)
+            content_data = {
+                "path": path,
+                "content": b"".join(chunks).decode("utf-8", errors="replace"),
+                "size": size,
+                "skipped": False
+            }
 
-        return create_response(200, data= {
-            "path": path,
-            "content": content,
-            "size": len(content),
-            "skipped": False
-        })
+        if cache_key:
+            gh_cache.put(cache_key, json.dumps(content_data).encode("utf-8"))
+
+        return create_response(200, data=content_data)
     
     except requests.exceptions.Timeout:
         logger.error(f"Timeout fetching content for {path}")
@@ -328,3 +627,28 @@ def get_file_content(owner: str, repo: str, path: str, max_size: int = 100000) -
     except requests.exceptions.RequestException as e:
         logger.error(f"Content request failed for {path}: {e}")
         return create_response(500)
+
+
+def get_file_contents_bulk(owner: str, repo: str, paths: list, max_workers: int = 8, ref: str = None) -> dict:
+    """
+    Fetches the contents of several files concurrently
+
+    Args:
+        owner: str: name of the owner of the repo
+        repo: str: name of the repository
+        paths: list: file paths to fetch
+        max_workers: int: maximum number of requests in flight (never more than len(paths)
+                          or HTTP_POOL_SIZE)
+        ref: str: commit SHA to read the files at (default branch if None)
+
+    Returns:
+        dict: {path: response} where each response is what get_file_content returns,
+              in the same order as paths
+    """
+    if not paths:
+        return {}
+
+    # No point starting threads that would sit idle or wait for a pooled connection
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths), HTTP_POOL_SIZE)) as executor:
+        responses = executor.map(lambda path: get_file_content(owner=owner, repo=repo, path=path, ref=ref), paths)
+        return dict(zip(paths, responses))
@@ -1,29 +1,60 @@
-import requests
 import boto3
 import os
 import json
+import gzip
+import time
 import logging
+import functools
+import itertools
+import uuid
 
-from decimal import Decimal
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from botocore.exceptions import ClientError
 
-from github_client import get_repo_metadata, get_latest_commit_sha, get_file_tree, get_file_content
-from file_scorer import get_high_value_files
+from github_client import get_repo_header, get_file_tree, get_file_contents_bulk
+from file_scorer import get_high_value_files, should_skip, MAX_FILE_SIZE
 from gemini_client import generate_suggestions, select_important_files
 
-# Initialize dynamodb
-dynamodb = boto3.resource('dynamodb')
-cache_table = dynamodb.Table(os.environ.get('CACHE_TABLE_NAME'))
+# DynamoDB cache table and S3 client, created on first use and reused across warm invocations
+_cache_table = None
+_s3_client = None
 
-# Number of days after which the cached entry will be deleted in the Cache table
+# Number of days after which the cached entry will be deleted in the Cache table, when
+# the repo's commit activity is unknown
 CACHE_TTL_DAYS = 7
 
+# Otherwise the TTL follows the time since the latest commit: an active repo's entry is
+# soon replaced by one for a newer SHA, a quiet repo's entry stays useful for longer
+CACHE_TTL_MIN_DAYS = 1
+CACHE_TTL_MAX_DAYS = 30
+
+# analysis and suggestions are stored as gzipped JSON (DynamoDB Binary). Suggestions larger than
+# this once compressed (in bytes) go to S3 with only their key kept in DynamoDB.
+# Needs CACHE_BUCKET_NAME; without it everything stays inline
+SUGGESTIONS_INLINE_MAX_BYTES = 16000
+
+# Attributes of a cache item the handler needs on a hit ('analysis' / 'suggestions' are
+# the uncompressed attributes of items written before compression was added)
+CACHE_READ_ATTRIBUTES = ('analysis_gz', 'suggestions_gz', 'suggestions_s3_key', 'analysis', 'suggestions')
+
+# In-process cache in front of DynamoDB for repos requested repeatedly while the Lambda
+# container is warm. Entries are versioned by commit SHA, the TTL only bounds memory churn
+LOCAL_CACHE_MAX_ENTRIES = 128
+LOCAL_CACHE_TTL_SECONDS = 600
+_local_cache = OrderedDict()
+
 # Minimum number of files threshold for hybrid approach
 MIN_FILES_THRESHOLD = 5
 
+# Source file extensions used when neither rules nor AI pick any files (a tuple so str.endswith can take it directly)
+_FALLBACK_EXTS = ('.py', '.js', '.ts', '.java', '.go', '.rs', '.cpp', '.c')
+
 logger = logging.getLogger()
 logger.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
 
+# Pure function; repeat traffic for the same repo skips the re-parse on warm invocations
+@functools.lru_cache(maxsize=1024)
 def parse_github_url(github_url: str) -> tuple:
     """
     Parse GitHub URL to extract owner and repo
@@ -53,28 +84,120 @@ def parse_github_url(github_url: str) -> tuple:
     return (owner, repo)
 
 
-def get_from_cache(cache_key: str, commit_sha: str) -> dict:
+def _get_cache_table():
+    """
+    Returns the DynamoDB cache table, creating the resource on first use
+    """
+    global _cache_table
+    if _cache_table is None:
+        _cache_table = boto3.resource('dynamodb').Table(os.environ.get('CACHE_TABLE_NAME'))
+    return _cache_table
+
+
+def _get_s3_client():
+    """
+    Returns the S3 client, creating it on first use
+    """
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client('s3')
+    return _s3_client
+
+
+def _compress_json(value) -> bytes:
+    """
+    Serializes value as gzipped JSON
+    """
+    return gzip.compress(json.dumps(value).encode('utf-8'))
+
+
+def _decompress_json(data):
+    """
+    Inverse of _compress_json; accepts bytes or a boto3 Binary
+    """
+    return json.loads(gzip.decompress(getattr(data, 'value', data)))
+
+
+def _local_cache_get(key: tuple) -> dict:
+    """
+    Returns the locally cached item for key, or None if missing / expired
+    """
+    entry = _local_cache.get(key)
+    if entry is None:
+        return None
+
+    stored_at, item = entry
+    if time.time() - stored_at > LOCAL_CACHE_TTL_SECONDS:
+        del _local_cache[key]
+        return None
+
+    # Mark as most recently used
+    _local_cache.move_to_end(key)
+    return item
+
+
+def _local_cache_put(key: tuple, item: dict) -> None:
+    """
+    Stores item in the local cache, evicting the least recently used entry when full
+    """
+    _local_cache[key] = (time.time(), item)
+    _local_cache.move_to_end(key)
+    if len(_local_cache) > LOCAL_CACHE_MAX_ENTRIES:
+        _local_cache.popitem(last=False)
+
+
+def get_from_cache(cache_key: str, commit_sha: str, attributes_to_get: tuple = CACHE_READ_ATTRIBUTES) -> dict:
     """
     Check cache for existing analysis
 
     Args:
         cache_key: str: GitHub repository URL
         commit_sha: str: Latest Commit SHA
+        attributes_to_get: tuple: attributes to read from the item. Pass ('commit_sha',)
+                                  to only check whether an entry exists
 
     Returns:
         dict of Cached data or None
     """
+    # Full reads are served from the warm container when possible
+    use_local_cache = attributes_to_get == CACHE_READ_ATTRIBUTES
+    if use_local_cache:
+        item = _local_cache_get((cache_key, commit_sha))
+        if item is not None:
+            logger.info(f"Local Cache Hit for repo: {cache_key}")
+            return item
+
+    # Only the requested attributes are read and sent back (placeholders avoid reserved-word clashes)
+    attribute_names = {f"#attr{i}": name for i, name in enumerate(attributes_to_get)}
+
     try:
-        response = cache_table.get_item(
+        response = _get_cache_table().get_item(
             Key={
                 'repo_url': cache_key,
                 'commit_sha': commit_sha
-            }
+            },
+            ProjectionExpression=", ".join(attribute_names),
+            ExpressionAttributeNames=attribute_names
         )
 
         if 'Item' in response:
             logger.info(f"Cache Hit for repo: {cache_key}")
-            return response["Item"]
+            item = response["Item"]
+
+            # Swap compressed attributes / the S3 pointer for the actual values
+            if 'analysis_gz' in item:
+                item['analysis'] = _decompress_json(item.pop('analysis_gz'))
+            if 'suggestions_gz' in item:
+                item['suggestions'] = _decompress_json(item.pop('suggestions_gz'))
+
+            s3_key = item.pop('suggestions_s3_key', None)
+            if s3_key:
+                s3_object = _get_s3_client().get_object(Bucket=os.environ.get('CACHE_BUCKET_NAME'), Key=s3_key)
+                item['suggestions'] = _decompress_json(s3_object['Body'].read())
+
+            if use_local_cache:
+                _local_cache_put((cache_key, commit_sha), item)
+            return item
         
         logger.info(f"Cache MISS for {cache_key}")
         return None
@@ -84,7 +207,70 @@ def get_from_cache(cache_key: str, commit_sha: str) -> dict:
         return None
 
 
-def save_to_cache(cache_key: str, commit_sha: str, analysis: dict, suggestions: list) -> bool:
+def _cache_ttl_days(commit_date: str) -> int:
+    """
+    Picks the cache TTL from how long ago the latest commit was made
+
+    Args:
+        commit_date: str: ISO 8601 date of the latest commit, or None
+
+    Returns:
+        int: days between CACHE_TTL_MIN_DAYS and CACHE_TTL_MAX_DAYS, CACHE_TTL_DAYS if the date is unknown
+    """
+    if not commit_date:
+        return CACHE_TTL_DAYS
+
+    try:
+        committed_at = datetime.fromisoformat(commit_date)
+    except ValueError:
+        logger.warning(f"Unparseable commit date: {commit_date}")
+        return CACHE_TTL_DAYS
+
+    if committed_at.tzinfo is None:
+        committed_at = committed_at.replace(tzinfo=timezone.utc)
+
+    days_since_commit = (datetime.now(timezone.utc) - committed_at).days
+    return max(CACHE_TTL_MIN_DAYS, min(days_since_commit, CACHE_TTL_MAX_DAYS))
+
+
+def _build_cache_item(cache_key: str, commit_sha: str, analysis: dict, suggestions: list, ttl_days: int = CACHE_TTL_DAYS) -> dict:
+    """
+    Builds the DynamoDB item stored for one analysis, expiring after ttl_days
+    """
+    # DynamoDB deletes the entry once this timestamp has passed
+    ttl = int((datetime.now() + timedelta(days=ttl_days)).timestamp())
+
+    # Payloads are stored gzipped: smaller items cost less to write, store and read back
+    item = {
+        'repo_url': cache_key,
+        'commit_sha': commit_sha,
+        'analysis_gz': _compress_json(analysis),
+        'created_at': datetime.now().isoformat(),
+        'ttl': ttl
+    }
+
+    # Keep DynamoDB items small: large suggestion lists go to S3 and only the key is stored
+    bucket = os.environ.get('CACHE_BUCKET_NAME')
+    suggestions_gz = _compress_json(suggestions)
+    if bucket and len(suggestions_gz) > SUGGESTIONS_INLINE_MAX_BYTES:
+        # Unique per writer, so a writer that loses the conditional put in save_to_cache
+        # never overwrites the object the winning item points to
+        s3_key = f"{cache_key}/{commit_sha}/{uuid.uuid4().hex}/suggestions.json.gz"
+        _get_s3_client().put_object(
+            Bucket=bucket,
+            Key=s3_key,
+            Body=suggestions_gz,
+            ContentType='application/json',
+            ContentEncoding='gzip'
+        )
+        item['suggestions_s3_key'] = s3_key
+    else:
+        item['suggestions_gz'] = suggestions_gz
+
+    return item
+
+
+def save_to_cache(cache_key: str, commit_sha: str, analysis: dict, suggestions: list, ttl_days: int = CACHE_TTL_DAYS) -> bool:
     """
     Save analysis results to cache
 
@@ -93,30 +279,78 @@ def save_to_cache(cache_key: str, commit_sha: str, analysis: dict, suggestions:
         commit_sha: Latest commit SHA
         analysis: Repository analysis data
         suggestions: Video suggestions from Gemini
+        ttl_days: Number of days to keep the entry
 
     Returns:
         True if successful, else False
     """
     try:
-        # creating a time stamp for 7 days, as we will keep the data in cache table only for 7 days and then delete it
-        ttl = int((datetime.now() + timedelta(days=CACHE_TTL_DAYS)).timestamp())
-
-        cache_table.put_item(
-            Item={
-                'repo_url': cache_key,
-                'commit_sha': commit_sha,
-                'analysis': analysis,
-                'suggestions': suggestions,
-                'created_at': datetime.now().isoformat(),
-                'ttl': ttl
-            }
+        # Two invocations racing on the same cache miss produce the same item;
+        # only the first write goes through, the second fails the condition cheaply
+        item = _build_cache_item(cache_key, commit_sha, analysis, suggestions, ttl_days)
+        _get_cache_table().put_item(
+            Item=item,
+            ConditionExpression='attribute_not_exists(commit_sha)'
         )
 
+        # Write-through so the next request in this container doesn't go to DynamoDB
+        _local_cache_put((cache_key, commit_sha), {'analysis': analysis, 'suggestions': suggestions})
+
         logger.info(f"Cached results for {cache_key}")
         return True
 
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            logger.error(f"Cache save error for repo {cache_key}: {e}")
+            return False
+
+        # The stored item points at the other writer's suggestions; drop our unused copy
+        s3_key = item.get('suggestions_s3_key')
+        if s3_key:
+            try:
+                _get_s3_client().delete_object(Bucket=os.environ.get('CACHE_BUCKET_NAME'), Key=s3_key)
+            except ClientError as delete_error:
+                logger.warning(f"Could not delete unused suggestions object {s3_key}: {delete_error}")
+
+        # Not written through locally: the next lookup should return the stored item, not ours
+        logger.info(f"Results for {cache_key} at {commit_sha} already cached")
+        return True
+
     except Exception as e:
-        logger.error(f"Cache save error for repo {cache_key}")
+        logger.error(f"Cache save error for repo {cache_key}: {e}")
+        return False
+
+
+def save_many_to_cache(entries: list) -> bool:
+    """
+    Save several analysis results to cache, grouped into BatchWriteItem calls (up to 25 items each)
+
+    Args:
+        entries: list of dicts with keys cache_key, commit_sha, analysis, suggestions
+                 and optionally ttl_days
+
+    Returns:
+        True if successful, else False
+    """
+    try:
+        with _get_cache_table().batch_writer() as batch:
+            for entry in entries:
+                batch.put_item(Item=_build_cache_item(
+                    entry["cache_key"], entry["commit_sha"], entry["analysis"], entry["suggestions"],
+                    entry.get("ttl_days", CACHE_TTL_DAYS)
+                ))
+
+        for entry in entries:
+            _local_cache_put(
+                (entry["cache_key"], entry["commit_sha"]),
+                {'analysis': entry["analysis"], 'suggestions': entry["suggestions"]}
+            )
+
+        logger.info(f"Cached results for {len(entries)} repos")
+        return True
+
+    except Exception as e:
+        logger.error(f"Batch cache save error: {e}")
         return False
 
 
@@ -127,7 +361,9 @@ def handler(event, context):
     Input: { "github_url": "https://github.com/owner/repo" }
     Output: { "analysis": {...}, "suggestions": [...] }
     """
-    logger.debug(f"Received event: {json.dumps(event)}")
+    # json.dumps of the whole event is only worth paying for when it will be emitted
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Received event: %s", json.dumps(event))
 
     # ============================================
     # STEP 1: Parse Input
@@ -152,34 +388,28 @@ def handler(event, context):
     logger.info(f"Analysing: {owner}/{repo}")
 
     # ============================================
-    # STEP 2: Get Repository Metadata
+    # STEP 2: Get Repository Metadata and Latest Commit SHA
     # ============================================
-    metadata_response = get_repo_metadata(owner=owner, repo=repo)
+    # One GraphQL request returns both, so a cache hit costs a single GitHub call
+    header_response = get_repo_header(owner=owner, repo=repo)
 
-    if metadata_response["statusCode"] != 200:
-        return metadata_response
-    
-    metadata = metadata_response["body"]["data"]
-    default_branch = metadata.get("default_branch", "main")
+    if header_response["statusCode"] != 200:
+        return header_response
 
-    logger.info(f"Repository: {metadata.get('name')}, Branch: {default_branch}")
+    metadata = header_response["body"]["data"]["metadata"]
+    default_branch = metadata.get("default_branch") or "main"
+    commit_sha = header_response["body"]["data"]["latest_commit_sha"]
 
-    # ============================================
-    # STEP 3: Get Latest Commit SHA
-    # ============================================
-    commit_response = get_latest_commit_sha(owner=owner, repo=repo, default_branch=default_branch)
+    logger.info(f"Repository: {metadata.get('name')}, Branch: {default_branch}")
 
-    if commit_response["statusCode"] != 200:
+    if not commit_sha:
         logger.error(f"Could not get SHA for {owner}/{repo}. Skipping Cache")
-        commit_sha = None
-    
     else:
-        commit_sha = commit_response["body"]["data"]["latest_commit_sha"]
         logger.info(f"Latest Commit SHA for {owner}/{repo} is {commit_sha}")
     
 
     # ============================================
-    # STEP 4: Check Cache
+    # STEP 3: Check Cache
     # ============================================
     if commit_sha:
         cached = get_from_cache(cache_key=cache_key, commit_sha=commit_sha)
@@ -193,14 +423,17 @@ def handler(event, context):
             }
     
     # ============================================
-    # STEP 5: Get File Tree - list of files in the repository
+    # STEP 4: Get File Tree - list of files in the repository
     # ============================================
-    tree_response = get_file_tree(owner=owner, repo=repo, branch=default_branch)
+    # Pinned to the analysed commit when known (which also lets it come from the local GitHub cache)
+    tree_response = get_file_tree(owner=owner, repo=repo, branch=commit_sha or default_branch)
 
     if tree_response["statusCode"] != 200:
         return tree_response
 
     all_files = tree_response["body"]["data"]["files"]
+    # Paths-only view built alongside all_files; reused by the fallback scan and the Gemini prompt
+    file_tree_paths = tree_response["body"]["data"]["file_paths"]
     file_count = tree_response["body"]["data"]["file_count"]
 
     logger.info(f"Found {file_count} files in {owner}/{repo}")
@@ -212,21 +445,33 @@ def handler(event, context):
         }
     
     # ============================================
-    # STEP 6: Filter High-Value Files (Hybrid)
+    # STEP 5: Filter High-Value Files (Hybrid)
     # ============================================
-    high_value_files = get_high_value_files(all_files, max_files=10)
-    selection_method = "rule-based"
+    if file_count <= MIN_FILES_THRESHOLD:
+        # Tiny repo: every analyzable file fits, so neither the scorer nor the AI
+        # selection could pick anything better. Analyzable means the same size
+        # limit and skip patterns score_file applies
+        high_value_files = [
+            f["path"] for f in all_files
+            if f.get("size", 0) <= MAX_FILE_SIZE and not should_skip(f["path"])
+        ]
+        selection_method = "tiny-repo"
 
-    logger.info(f"Rule-based scoring found {len(high_value_files)} files: {high_value_files}")
+        logger.info(f"Tiny repo, using all {len(high_value_files)} analyzable files")
+    else:
+        high_value_files = get_high_value_files(all_files, max_files=10)
+        selection_method = "rule-based"
+
+        logger.info("Rule-based scoring found %d files: %s", len(high_value_files), high_value_files)
 
     # Hybrid: Use AI if rule-based found insufficient files
-    if len(high_value_files) < MIN_FILES_THRESHOLD:
+    if selection_method == "rule-based" and len(high_value_files) < MIN_FILES_THRESHOLD:
         logger.info(f"Only {len(high_value_files)} files from rules, trying AI selection...")
         ai_selected = select_important_files(files=all_files, max_files=10)
 
         if ai_selected:
-            # Merge unique files from both approaches
-            combined = list(set(high_value_files + ai_selected))[:10]
+            # Merge unique files from both approaches, keeping the rule-based ranking first
+            combined = list(dict.fromkeys(high_value_files + ai_selected))[:10]
             
             if len(combined) > len(high_value_files):
                 high_value_files = combined
@@ -237,11 +482,11 @@ def handler(event, context):
     fallback_files = []
     # If both AI and rule based found no files 
     if len(high_value_files) == 0 and file_count > 0:
-        fallback_extensions = {'.py', '.js', '.ts', '.java', '.go', '.rs', '.cpp', '.c'}
-        fallback_files = [
-            f["path"] for f in all_files
-            if any(f["path"].endswith(ext) for ext in fallback_extensions)
-        ][:5]
+        # Stops scanning as soon as 5 matches are found
+        fallback_files = list(itertools.islice(
+            (path for path in file_tree_paths if path.endswith(_FALLBACK_EXTS)),
+            5
+        ))
     
     if fallback_files:
         high_value_files = fallback_files
@@ -255,40 +500,53 @@ def handler(event, context):
         }
 
     # ============================================
-    # STEP 7: Fetch File Contents
+    # STEP 6: Fetch File Contents
     # ============================================
-    file_contents = {}
-
-    for file_path in high_value_files:
-        content_response = get_file_content(owner=owner, repo=repo, path=file_path)
+    # Kept as parallel lists (path, content) rather than a dict; the
+    # prompt is built with a single join over them
+    fetched_paths = []
+    fetched_contents = []
+    fetched_bytes = 0
+
+    # Requests are issued concurrently (one per file, up to 10 in flight, so
+    # wall time is ~1 round-trip); results come back in high_value_files order
+    content_responses = get_file_contents_bulk(
+        owner=owner,
+        repo=repo,
+        paths=high_value_files,
+        max_workers=10,
+        ref=commit_sha
+    )
 
+    for file_path, content_response in content_responses.items():
         if content_response["statusCode"] == 200:
             data = content_response["body"]["data"]
             if not data.get("skipped"):
-                file_contents[file_path] = data["content"]
-                logger.info(f"Fetched: {file_path} ({data['size']} bytes)")
+                fetched_paths.append(file_path)
+                fetched_contents.append(data["content"])
+                fetched_bytes += data["size"]
+                logger.info("Fetched: %s (%d bytes)", file_path, data['size'])
             else:
-                logger.info(f"Skipped: {file_path} ({data.get('reason')})")
+                logger.info("Skipped: %s (%s)", file_path, data.get('reason'))
         else:
-            logger.warning(f"Failed to fetch: {file_path}")
+            logger.warning("Failed to fetch: %s", file_path)
         
-    logger.info(f"Fetched content for {len(file_contents)} files")
+    logger.info("Fetched content for %d files (%d bytes)", len(fetched_paths), fetched_bytes)
 
-    if len(file_contents) == 0:
+    if len(fetched_paths) == 0:
         return {
             "statusCode": 400,
             "body": {"error_code": "NO_FILE_CONTENT_FETCHED"}
         }
 
     # ============================================
-    # STEP 8: Generate Suggestions with Gemini
+    # STEP 7: Generate Suggestions with Gemini
     # ============================================
-    file_tree_paths = [f["path"] for f in all_files]
-
     gemini_response = generate_suggestions(
         metadata=metadata,
         file_tree=file_tree_paths,
-        file_contents=file_contents
+        paths=fetched_paths,
+        contents=fetched_contents
     )
 
     if gemini_response["statusCode"] != 200:
@@ -299,7 +557,7 @@ def handler(event, context):
     logger.info(f"Generated {len(suggestions)} video suggestions")
 
     # ============================================
-    # STEP 9: Build Analysis Object
+    # STEP 8: Build Analysis Object
     # ============================================
     analysis = {
         "repo_name": metadata.get("name"),
@@ -310,18 +568,19 @@ def handler(event, context):
         "html_url": metadata.get("html_url"),
         "default_branch": default_branch,
         "file_count": file_count,
-        "files_analyzed": list(file_contents.keys()),
+        "files_analyzed": fetched_paths,
         "selection_method": selection_method
     }
     
     # ============================================
-    # STEP 10: Save to Cache
+    # STEP 9: Save to Cache
     # ============================================
     if commit_sha:
-        save_to_cache(cache_key, commit_sha, analysis, suggestions)
+        ttl_days = _cache_ttl_days(header_response["body"]["data"].get("latest_commit_date"))
+        save_to_cache(cache_key, commit_sha, analysis, suggestions, ttl_days)
     
     # ============================================
-    # STEP 11: Return Results
+    # STEP 10: Return Results
     # ============================================
     return {
         "analysis": analysis,